@@ -1,5 +1,15 @@
-from sqlalchemy import text, Sequence, Row, Connection, create_engine, Engine
+from sqlalchemy import text, Connection, create_engine, Engine
+import json
 import os
+import re
+import threading
+
+import metadata_cache
+
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
 
 def create_db_url() -> str:
@@ -33,16 +43,44 @@ def create_db_url() -> str:
 
 
 def init_db_engine() -> Engine:
-    try:
-        # Create the database engine using the URL from environment variables
-        postgres_uri = create_db_url()
-        engine = create_engine(postgres_uri)
+    """
+    Returns the shared, lazily created SQLAlchemy engine.
 
-    except ValueError as e:
-        # Raise an error if the database engine creation fails
-        raise ValueError(f"error occurred while creating db engine: {e}")
+    The engine keeps a connection pool that is checked with a liveness ping before each checkout and recycled
+    periodically, so every caller reuses warm connections instead of paying the connection setup cost. Pool size
+    and overflow can be tuned with the DB_POOL_SIZE and DB_MAX_OVERFLOW environment variables. Keep the overflow
+    modest: every overflow connection is opened from scratch and discarded afterwards.
 
-    return engine
+    Returns:
+        Engine: The SQLAlchemy engine connected to the database.
+
+    Raises:
+        ValueError: If the database engine could not be created.
+    """
+    global _engine
+
+    if _engine is not None:
+        return _engine
+
+    with _engine_lock:
+        if _engine is None:
+            try:
+                # Create the database engine using the URL from environment variables
+                postgres_uri = create_db_url()
+                _engine = create_engine(
+                    postgres_uri,
+                    pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+                    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 20)),
+                    pool_timeout=30,
+                    pool_pre_ping=True,
+                    pool_recycle=1800,
+                )
+
+            except ValueError as e:
+                # Raise an error if the database engine creation fails
+                raise ValueError(f"error occurred while creating db engine: {e}")
+
+    return _engine
 
 
 def get_db_connection(engine):
@@ -66,36 +104,133 @@ def get_db_connection(engine):
         raise ValueError("Engine is not initialized.")
 
 
-def get_table_rows(conn: Connection, table: str) -> Sequence[Row]:
+def is_valid_table_name(table: str) -> bool:
+    """
+    Checks whether a table name is a plain SQL identifier that can be sampled.
+
+    Args:
+        table (str): The name of the table.
+
+    Returns:
+        bool: True if the name matches ^[A-Za-z_][A-Za-z0-9_]*$, False otherwise.
+    """
+    return bool(_IDENTIFIER_RE.match(table))
+
+
+def quote_table_name(conn: Connection, table: str) -> str:
+    """
+    Validates a table name and quotes it for the connection's dialect.
+
+    Args:
+        conn (Connection): The database connection object.
+        table (str): The name of the table.
+
+    Returns:
+        str: The quoted table name, safe to embed in a SQL statement.
+
+    Raises:
+        ValueError: If the table name is not a plain SQL identifier.
+    """
+    if not is_valid_table_name(table):
+        raise ValueError(f"Invalid table name: {table!r}")
+    return conn.dialect.identifier_preparer.quote_identifier(table)
+
+
+def get_table_rows(conn: Connection, table: str) -> list[dict]:
     """
     Retrieves rows from a specified table.
 
-    This function executes a SQL query to fetch the first 5 rows from the specified table.
+    This function executes a SQL query to fetch the first 5 rows from the specified table. Results are kept in the
+    metadata cache under the same key as the samples of get_sample_rows_bulk.
 
     Args:
         conn (Connection): The database connection object.
         table (str): The name of the table to retrieve rows from.
 
     Returns:
-        Sequence[Row]: A sequence of rows from the table.
+        list[dict]: The rows from the table, as column to value mappings.
+
+    Raises:
+        ValueError: If the connection is not initialized or the table name is invalid.
+    """
+    if conn is None:
+        raise ValueError("Connection is not initialized.")
+    query = text(f"SELECT * FROM {quote_table_name(conn, table)} LIMIT 5;")
+    return metadata_cache.get_or_set(
+        ("sample_rows", table),
+        lambda: [dict(row._mapping) for row in conn.execute(query)],
+    )
+
+
+def get_sample_rows_bulk(conn: Connection, tables: list[str]) -> dict[str, list[dict]]:
+    """
+    Retrieves sample rows for several tables in a single round trip.
+
+    On PostgreSQL the first 5 rows of every table are fetched with one UNION ALL query, each row serialized with
+    row_to_json so tables with different columns can share a result set. Other dialects fall back to one query
+    per table. Tables whose samples are in the metadata cache are not queried again. Tables whose names are not
+    plain SQL identifiers are skipped with a warning and left out of the result.
+
+    Args:
+        conn (Connection): The database connection object.
+        tables (list[str]): The names of the tables to retrieve rows from.
+
+    Returns:
+        dict[str, list[dict]]: The sample rows of each table, keyed by table name, as column to value mappings.
 
     Raises:
         ValueError: If the connection is not initialized.
     """
     if conn is None:
         raise ValueError("Connection is not initialized.")
-    query = text(f"SELECT * FROM {table} LIMIT 5;")
-    exe = conn.execute(query)
-    results = exe.fetchall()
-    result = [row for row in results]
-    return result
+
+    invalid = [table for table in tables if not is_valid_table_name(table)]
+    if invalid:
+        print(f"Skipping tables with unsupported names: {invalid}")
+        tables = [table for table in tables if table not in invalid]
+
+    if not tables:
+        return {}
+
+    if conn.dialect.name != "postgresql":
+        return {table: get_table_rows(conn, table) for table in tables}
+
+    samples: dict[str, list[dict] | None] = {table: metadata_cache.get(("sample_rows", table)) for table in tables}
+    missing = [table for table in tables if samples[table] is None]
+    if not missing:
+        return samples
+
+    selects = [
+        f"SELECT CAST(:t{i} AS text) AS __t, row_to_json(s)::text AS __row "
+        f"FROM (SELECT * FROM {quote_table_name(conn, table)} LIMIT 5) s"
+        for i, table in enumerate(missing)
+    ]
+    query = text(" UNION ALL ".join(selects)).bindparams(**{f"t{i}": table for i, table in enumerate(missing)})
+
+    for table in missing:
+        samples[table] = []
+    for table, row in conn.execute(query):
+        samples[table].append(json.loads(row))
+
+    for table in missing:
+        metadata_cache.put(("sample_rows", table), samples[table])
+
+    return samples
+
+
+def invalidate_schema_cache() -> None:
+    """
+    Clears the cached schema metadata, forcing the next calls to query the database.
+    """
+    metadata_cache.invalidate_all()
 
 
 def get_all_tables(conn) -> list[str]:
     """
     Retrieves all table names from the database.
 
-    This function executes a SQL query to fetch the names of all tables in the public schema.
+    This function executes a SQL query to fetch the names of all tables in the public schema. Results are kept in
+    the metadata cache per database; call invalidate_schema_cache after DDL changes.
 
     Args:
         conn (Connection): The database connection object.
@@ -108,12 +243,24 @@ def get_all_tables(conn) -> list[str]:
     """
     if conn is None:
         raise ValueError("Connection is not initialized.")
-    query = text("""
-    SELECT table_name FROM 
-    information_schema.tables 
-    WHERE table_schema = 'public' 
-      AND table_type = 'BASE TABLE';
-    """)
-    exe = conn.execute(query)
-    results = exe.fetchall()
-    return [row[0] for row in results]
+
+    if conn.dialect.name == "postgresql":
+        # Read the catalog directly instead of the information_schema view, keeping only tables the role can read
+        query = text("""
+        SELECT c.relname FROM
+        pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public'
+          AND c.relkind IN ('r', 'p')
+          AND has_table_privilege(c.oid, 'SELECT');
+        """)
+    else:
+        query = text("""
+        SELECT table_name FROM
+        information_schema.tables
+        WHERE table_schema = 'public'
+          AND table_type = 'BASE TABLE';
+        """)
+
+    tables = metadata_cache.get_or_set(("tables", str(conn.engine.url)), lambda: list(conn.execute(query).scalars()))
+    return list(tables)
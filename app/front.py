@@ -1,10 +1,18 @@
+import os
+
 import streamlit as st
+import metadata_cache
 from orchestrator import orchestrator, init_text_to_sql
 
 
-def app(sql_engine, database, openai_llm, obj_retriever, table_context_creator):
+def app(dialect, pipeline):
     st.title("Text To Sql Bot")
 
+    # Admin tool: drop cached table metadata so it is read from the database again. The tables known to the
+    # pipeline are not affected, new or dropped tables need SCHEMA_REFRESH=1 and a restart
+    if os.getenv("ADMIN_TOOLS", "0") == "1" and st.sidebar.button("Clear cached table metadata"):
+        metadata_cache.invalidate_all()
+
     # Initialize chat history
     if "messages" not in st.session_state:
         st.session_state.messages = []
@@ -24,13 +32,9 @@ def app(sql_engine, database, openai_llm, obj_retriever, table_context_creator):
         st.session_state.messages.append({"role": "user", "content": prompt})
 
         response = orchestrator(
-            llm=openai_llm,
-            db=database,
-            obj_retriever=obj_retriever,
-            context_creator=table_context_creator,
-            dialect=sql_engine.dialect.name,
+            qp=pipeline,
+            dialect=dialect,
             question=prompt,
-            verbose=True,
         )
 
         response = f"Assistant: {response}"
@@ -43,5 +47,9 @@ def app(sql_engine, database, openai_llm, obj_retriever, table_context_creator):
 
 
 if __name__ == "__main__":
-    engine, db, llm, retriever, context_creator = init_text_to_sql()
-    app(engine, db, llm, retriever, context_creator)
+    # Initialize once per session, Streamlit reruns this script on every interaction
+    if "pipeline" not in st.session_state:
+        engine, st.session_state.pipeline = init_text_to_sql(verbose=True)
+        st.session_state.dialect = engine.dialect.name
+
+    app(st.session_state.dialect, st.session_state.pipeline)
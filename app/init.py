@@ -2,21 +2,23 @@ from orchestrator import init_text_to_sql, orchestrator
 
 
 if __name__ == "__main__":
-    engine, db, llm, retriever, context_creator = init_text_to_sql()
+    engine, qp = init_text_to_sql(verbose=True)
 
     while True:
-        prompt = "Give me the most sold categories"
+        try:
+            prompt = input("> ").strip()
+        except (EOFError, KeyboardInterrupt):
+            break
+
         if prompt == "exit":
             break
+        if not prompt:
+            continue
 
         response = orchestrator(
-            llm=llm,
-            db=db,
-            obj_retriever=retriever,
-            context_creator=context_creator,
+            qp=qp,
             dialect=engine.dialect.name,
             question=prompt,
-            verbose=True,
         )
 
         print(response)
@@ -0,0 +1,105 @@
+import os
+import threading
+from typing import Any, Callable, Hashable
+
+from cachetools import TTLCache
+
+_cache: TTLCache | None = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache() -> TTLCache:
+    """
+    Returns the shared cache, creating it on first use so METADATA_CACHE_TTL can be loaded from the .env file first.
+
+    Must be called with the cache lock held.
+
+    Returns:
+        TTLCache: The shared cache.
+    """
+    global _cache
+
+    if _cache is None:
+        _cache = TTLCache(maxsize=1024, ttl=float(os.getenv("METADATA_CACHE_TTL", 600)))
+    return _cache
+
+
+def get(key: Hashable) -> Any | None:
+    """
+    Retrieves a cached metadata value.
+
+    Keys are tuples whose first element names the kind of metadata, e.g. ("tables", dsn), ("sample_rows", table)
+    or ("single_table_info", table). Values expire after METADATA_CACHE_TTL seconds (600 by default).
+
+    Args:
+        key (Hashable): The cache key.
+
+    Returns:
+        Any | None: The cached value, or None if it is missing or expired.
+    """
+    with _cache_lock:
+        return _get_cache().get(key)
+
+
+def put(key: Hashable, value: Any):
+    """
+    Stores a metadata value in the cache.
+
+    Args:
+        key (Hashable): The cache key.
+        value (Any): The value to store.
+    """
+    with _cache_lock:
+        _get_cache()[key] = value
+
+
+def get_or_set(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """
+    Retrieves a cached metadata value, computing and storing it if it is missing or expired.
+
+    The value is computed without holding the cache lock, so slow database calls do not block other readers.
+
+    Args:
+        key (Hashable): The cache key.
+        factory (Callable[[], Any]): The function computing the value when it is not cached.
+
+    Returns:
+        Any: The cached or freshly computed value.
+    """
+    value = get(key)
+    if value is None:
+        value = factory()
+        put(key, value)
+    return value
+
+
+def invalidate(key: Hashable):
+    """
+    Removes a single value from the cache.
+
+    Args:
+        key (Hashable): The cache key.
+    """
+    with _cache_lock:
+        _get_cache().pop(key, None)
+
+
+def invalidate_prefix(prefix: tuple):
+    """
+    Removes every value whose key starts with the given elements.
+
+    Args:
+        prefix (tuple): The leading elements of the keys to remove, e.g. ("table_context", table).
+    """
+    with _cache_lock:
+        cache = _get_cache()
+        for key in [key for key in cache if isinstance(key, tuple) and key[:len(prefix)] == prefix]:
+            cache.pop(key, None)
+
+
+def invalidate_all():
+    """
+    Removes every value from the cache, so all metadata is read from the database again on next use.
+    """
+    with _cache_lock:
+        _get_cache().clear()
@@ -1,8 +1,8 @@
-from pydantic import BaseModel, conint
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Annotated, Optional
 
 
 class Request(BaseModel):
     """A model representing an HTTP request."""
     question: str
-    retry: Optional[conint(ge=1)] = 1
\ No newline at end of file
+    retry: Optional[Annotated[int, Field(ge=1)]] = 1
\ No newline at end of file
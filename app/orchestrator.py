@@ -3,11 +3,10 @@ from sqlalchemy import Engine
 from db import init_db_engine
 from vector_db import initialize_vector_db
 from prompts import prompts
+from query_cache import query_cache
 from text_to_sql import LlmResponseParser, TableContextCreator
 
 from llama_index.llms.openai import OpenAI
-from llama_index.core.objects import ObjectRetriever
-from llama_index.core.query_pipeline import FnComponent
 from llama_index.core.indices.struct_store.sql_retriever import SQLRetriever
 from llama_index.core import SQLDatabase, PromptTemplate
 
@@ -17,17 +16,19 @@ from llama_index.core.query_pipeline import (
 )
 
 
-def init_text_to_sql() -> (Engine, SQLDatabase, OpenAI, ObjectRetriever, FnComponent):
+def init_text_to_sql(verbose: bool = False) -> (Engine, QueryPipeline):
     """
-    Initializes the components required for the Text-to-SQL application.
+    Initializes the components required for the Text-to-SQL application and builds its query pipeline.
+
+    The pipeline is built once here and reused for every question.
+
+    Args:
+        verbose (bool): Whether to print verbose output when the pipeline runs.
 
     Returns:
         tuple: A tuple containing the following elements:
             - engine (Engine): The SQLAlchemy engine object.
-            - db (SQLDatabase): The SQL database object.
-            - llm (OpenAI): The language model object.
-            - obj_retriever (ObjectRetriever): The object retriever component for the vector database.
-            - context_creator_component (FnComponent): The context creator component for the vector database.
+            - qp (QueryPipeline): The query pipeline answering questions.
     """
     # Load environment variables from a .env file
     load_dotenv()
@@ -46,20 +47,28 @@ def init_text_to_sql() -> (Engine, SQLDatabase, OpenAI, ObjectRetriever, FnCompo
     context_creator = TableContextCreator(db)
     context_creator_component = context_creator.get_component()
 
-    return engine, db, llm, obj_retriever, context_creator_component
+    qp = build_query_pipeline(
+        llm=llm,
+        db=db,
+        obj_retriever=obj_retriever,
+        context_creator=context_creator_component,
+        dialect=engine.dialect.name,
+        verbose=verbose,
+    )
+
+    return engine, qp
 
 
-def orchestrator(
+def build_query_pipeline(
         llm,
         db,
         obj_retriever,
         context_creator,
         dialect: str,
-        question: str,
         verbose: bool = False,
-) -> str:
+) -> QueryPipeline:
     """
-    Orchestrates the process of generating and executing an SQL query from a natural language question.
+    Builds the query pipeline that generates and executes an SQL query from a natural language question.
 
     Args:
         llm (OpenAI): The language model used for generating SQL queries and responses.
@@ -68,8 +77,50 @@ def orchestrator(
         store.
         context_creator (FnComponent): The component responsible for creating context strings for tables.
         dialect (str): The SQL dialect to be used (e.g., 'mysql', 'postgresql').
+        verbose (bool): Whether to print verbose output when the pipeline runs.
+
+    Returns:
+        QueryPipeline: The configured query pipeline object.
+    """
+    # Text to SQL prompt. This is the prompt that the model will use to generate the SQL query
+    text2sql_prompt_str = PromptTemplate(prompts.text_to_sql)
+    text2sql_prompt = text2sql_prompt_str.partial_format(dialect=dialect)
+
+    # Parse response to SQL query
+    response_parser = LlmResponseParser()
+    sql_parser_component = response_parser.parse_sql_component()
+
+    # Prepare the response synthesis prompt
+    question_synthesis_prompt = PromptTemplate(prompts.question_synthesis)
+
+    # Create and configure the query pipeline
+    qp = Qp(
+        verbose=verbose,
+        modules={
+            "input": InputComponent(),
+            "obj_retriever": obj_retriever,
+            "context_creator_component": context_creator,
+            "text2sql_prompt": text2sql_prompt,
+            "text2sql_llm": llm,
+            "sql_output_parser": sql_parser_component,
+            "sql_retriever": SQLRetriever(db),
+            "question_synthesis_prompt": question_synthesis_prompt,
+            "response_synthesis_llm": llm,
+        },
+    )
+
+    # Orchestrate the pipeline
+    return pipeline_orchestrator(qp)
+
+
+def orchestrator(qp: QueryPipeline, dialect: str, question: str) -> str:
+    """
+    Answers a natural language question by running the query pipeline.
+
+    Args:
+        qp (QueryPipeline): The query pipeline built by init_text_to_sql.
+        dialect (str): The SQL dialect the pipeline generates queries for (e.g., 'mysql', 'postgresql').
         question (str): The natural language question to be converted into an SQL query.
-        verbose (bool): Whether to print verbose output during the orchestration process.
 
     Returns:
         str: The final response generated by the language model.
@@ -78,39 +129,19 @@ def orchestrator(
         Exception: If any error occurs during the orchestration process, the exception is caught and its message is
         returned.
     """
-    try:
-        # Text to SQL prompt. This is the prompt that the model will use to generate the SQL query
-        text2sql_prompt_str = PromptTemplate(prompts.text_to_sql)
-        text2sql_prompt = text2sql_prompt_str.partial_format(dialect=dialect)
-
-        # Parse response to SQL query
-        response_parser = LlmResponseParser()
-        sql_parser_component = response_parser.parse_sql_component()
-
-        # Prepare the response synthesis prompt
-        question_synthesis_prompt = PromptTemplate(prompts.question_synthesis)
-
-        # Create and configure the query pipeline
-        qp = Qp(
-            verbose=verbose,
-            modules={
-                "input": InputComponent(),
-                "obj_retriever": obj_retriever,
-                "context_creator_component": context_creator,
-                "text2sql_prompt": text2sql_prompt,
-                "text2sql_llm": llm,
-                "sql_output_parser": sql_parser_component,
-                "sql_retriever": SQLRetriever(db),
-                "question_synthesis_prompt": question_synthesis_prompt,
-                "response_synthesis_llm": llm,
-            },
-        )
-
-        # Orchestrate the pipeline
-        qp = pipeline_orchestrator(qp)
+    # Answer repeated questions without calling the language model again
+    cached = query_cache.get(dialect, question)
+    if cached is not None:
+        return cached[1]
 
+    try:
         response, intermediates = qp.run_with_intermediates(question=question)
-        return extract_response(str(response))
+        response = extract_response(str(response))
+
+        sql_query = intermediates["sql_output_parser"].outputs["output"]
+        query_cache.put(dialect, question, sql_query, response)
+
+        return response
 
     except Exception as e:
         return str(e)
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Trailing sentence punctuation that does not change the meaning of a question
+_TRAILING_PUNCTUATION = "?!."
+
+
+def normalize(question: str) -> str:
+    """
+    Normalizes a question so that trivially different phrasings share a cache entry.
+
+    The question is lowercased, consecutive whitespace is collapsed and trailing "?", "!" and "." are trimmed.
+    Any other punctuation is kept, since operators, decimal points, minus signs and quotes change what is asked.
+
+    Args:
+        question (str): The natural language question.
+
+    Returns:
+        str: The normalized question.
+    """
+    return " ".join(question.lower().split()).rstrip(_TRAILING_PUNCTUATION).rstrip()
+
+
+class QueryCache:
+    """
+    A bounded, time-limited cache of answered questions.
+
+    Entries are keyed by SQL dialect and normalized question and hold the generated SQL query, the final response
+    and the time they were stored. The least recently used entry is evicted once the cache is full, and entries
+    older than the TTL are treated as missing.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float | None = None):
+        """
+        Initializes the QueryCache with the given size and time to live.
+
+        Args:
+            maxsize (int): The maximum number of entries kept in the cache.
+            ttl (float | None): The number of seconds an entry stays valid. Defaults to the QUERY_CACHE_TTL
+                environment variable, or 300 seconds if it is not set.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], tuple[str, str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dialect: str, question: str) -> tuple[str, str] | None:
+        """
+        Retrieves the cached SQL query and response for a question.
+
+        Args:
+            dialect (str): The SQL dialect the query was generated for.
+            question (str): The natural language question.
+
+        Returns:
+            tuple[str, str] | None: The SQL query and the response, or None if there is no valid entry.
+        """
+        key = (dialect, normalize(question))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            sql, response, ts = entry
+            ttl = self.ttl if self.ttl is not None else float(os.getenv("QUERY_CACHE_TTL", 300))
+            if time.monotonic() - ts >= ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return sql, response
+
+    def put(self, dialect: str, question: str, sql: str, response: str):
+        """
+        Stores the SQL query and response generated for a question.
+
+        Args:
+            dialect (str): The SQL dialect the query was generated for.
+            question (str): The natural language question.
+            sql (str): The SQL query generated for the question.
+            response (str): The final response returned to the user.
+        """
+        key = (dialect, normalize(question))
+
+        with self._lock:
+            self._entries[key] = (sql, response, time.monotonic())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+query_cache = QueryCache()
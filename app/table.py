@@ -1,13 +1,18 @@
+import asyncio
+import os
 from typing import List
 from llama_index.core.bridge.pydantic import BaseModel
 from llama_index.core.objects import SQLTableSchema
 from llama_index.core.program import LLMTextCompletionProgram
-from sqlalchemy import text, Sequence, Row, Engine
+from sqlalchemy import Engine
 
 import db
 from models.table import TableInfo
 from pathlib import Path
-import json
+import orjson
+
+# File, inside the table info directory, listing the tables found by the last database inspection
+TABLE_LIST_FILE = "_tables.json"
 
 
 class TableDescriber:
@@ -35,10 +40,13 @@ class TableDescriber:
         """
         self.table_info_dir = table_info_dir
         self.program = program
-        self.conn = db.get_db_connection(engine)
+        self.engine = engine
         self.table_infos: List[SQLTableSchema] = []
         self.loaded_tables: set = set()
         self._create_folder()
+        self._disk_index: dict[str, Path] = {
+            path.stem: path for path in Path(self.table_info_dir).glob("*.json") if path.name != TABLE_LIST_FILE
+        }
 
     def _create_folder(self):
         """
@@ -51,29 +59,75 @@ class TableDescriber:
         Retrieves table information for a given filename from the file system, validates it, and returns a TableInfo
         instance.
 
+        The file is looked up in the index of table information files built when the describer is created, so the
+        directory is not listed again for every table.
+
         Args:
             filename (str): The name of the file to retrieve table information from.
 
         Returns:
             TableInfo | None: The TableInfo instance if found and valid, otherwise None.
         """
-        results_list = list(Path(self.table_info_dir).glob(f"{filename}*"))
-        results_len = len(results_list)
+        path = self._disk_index.get(filename)
+        if path is None:
+            return None
+
+        return TableInfo.parse_obj(orjson.loads(path.read_bytes()))
+
+    def _save_table_list(self, tables: list[str]):
+        """
+        Saves the names of the tables found in the database, so later runs know which descriptions they need.
+
+        Args:
+            tables (list[str]): The names of the database tables.
+        """
+        (Path(self.table_info_dir) / TABLE_LIST_FILE).write_bytes(orjson.dumps(tables))
+
+    def _load_table_list(self) -> list[str] | None:
+        """
+        Loads the names of the tables found by the last database inspection.
 
-        if results_len == 0:
+        Returns:
+            list[str] | None: The names of the tables, or None if the database was never inspected.
+        """
+        path = Path(self.table_info_dir) / TABLE_LIST_FILE
+        if not path.exists():
             return None
-        elif results_len == 1:
-            path = results_list[0]
-            return TableInfo.parse_file(path)
-        else:
-            raise ValueError(f"More than one file matching index: {results_list}")
 
-    def _parse_table_info(self, rows: Sequence[Row], table_name: str) -> BaseModel | None:
+        return orjson.loads(path.read_bytes())
+
+    def _inspect_tables(self) -> tuple[list[TableInfo | None], list[str], dict[str, list[dict]]]:
+        """
+        Lists the database tables, loads their stored descriptions and fetches sample rows for the missing ones.
+
+        All queries share one pooled connection in autocommit mode, so the read-only catalog and sample queries do
+        not open a transaction each, and the connection is returned to the pool as soon as inspection is done.
+
+        Returns:
+            tuple: A tuple containing the following elements:
+                - table_infos (list[TableInfo | None]): The stored description of each table, or None if missing.
+                - missing (list[str]): The names of the tables without a stored description.
+                - samples (dict[str, list[dict]]): The sample rows of each missing table that could be sampled, keyed
+                    by table name.
+        """
+        with db.get_db_connection(self.engine) as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            tables = db.get_all_tables(conn)
+            # Tables with unsupported names are never described, so they must not block the stored-only path
+            self._save_table_list([table_name for table_name in tables if db.is_valid_table_name(table_name)])
+            table_infos = [self._get_table_info_with_index(table_name) for table_name in tables]
+
+            missing = [table_name for table_name, table_info in zip(tables, table_infos) if table_info is None]
+            samples = db.get_sample_rows_bulk(conn, missing)
+
+        return table_infos, missing, samples
+
+    async def _parse_table_info(self, rows: list[dict], table_name: str) -> BaseModel | None:
         """
         Parses table information from database rows and returns a BaseModel instance.
 
         Args:
-            rows (Sequence[Row]): The rows retrieved from the database.
+            rows (list[dict]): The sample rows retrieved from the database.
             table_name (str): The name of the table being parsed.
 
         Returns:
@@ -81,7 +135,7 @@ class TableDescriber:
              or None if parsing fails.
         """
         try:
-            table_info = self.program(
+            table_info = await self.program.acall(
                 table_str=rows,
                 exclude_table_name_list=str(list(self.loaded_tables))
             )
@@ -122,45 +176,105 @@ class TableDescriber:
         """
         if not save_file:
             return
-        out_file = f"{self.table_info_dir}/{table_info.table_name}.json"
-        json.dump(table_info.dict(), open(out_file, "w"))
+        out_file = Path(self.table_info_dir) / f"{table_info.table_name}.json"
+        out_file.write_bytes(orjson.dumps(table_info.dict()))
+        self._disk_index[table_info.table_name] = out_file
 
-    def _process_parsing(self, table_name: str) -> BaseModel:
+    async def _process_parsing(self, table_name: str, rows: list[dict]) -> BaseModel | None:
         """
         Processes the parsing of a table and saves its information.
 
         Args:
             table_name (str): The name of the table to process.
+            rows (list[dict]): The sample rows retrieved for the table.
 
         Returns:
-            BaseModel: The parsed table information.
+            BaseModel | None: The parsed table information, or None if the table could not be described.
         """
-        rows = db.get_table_rows(self.conn, table_name)
-        table_info = self._parse_table_info(rows, table_name)
+        table_info = await self._parse_table_info(rows, table_name)
+        if table_info is None:
+            print(f"Skipping table {table_name}, it will be described again on the next run")
+            return None
+
         save_file = self._add_table_name(table_info)
         self._save_table_info_file(table_info, save_file)
         return table_info
 
-    def get_descriptions(self):
+    def _add_schema(self, table_info: TableInfo) -> SQLTableSchema:
         """
-        Retrieves descriptions for all tables in the database.
+        Records the description of a table as a SQLTableSchema.
+
+        Args:
+            table_info (TableInfo): The table information.
 
         Returns:
-            List[SQLTableSchema]: A list of SQLTableSchema instances containing table descriptions.
+            SQLTableSchema: The schema with the table name and its description.
         """
-        tables = db.get_all_tables(self.conn)
+        table_schema = SQLTableSchema(
+            table_name=table_info.table_name,
+            context_str=table_info.table_summary,
+        )
+        self.table_infos.append(table_schema)
+        return table_schema
 
-        for table_name in tables:
-            table_info = self._get_table_info_with_index(table_name)
+    async def get_descriptions(self):
+        """
+        Yields batches of table descriptions as soon as they are available.
 
-            if table_info is None:
-                table_info = self._process_parsing(table_name)
+        When every table found by the last database inspection has a description stored on disk, those
+        descriptions are yielded as a single batch without querying the database at all, unless SCHEMA_REFRESH is
+        set to "1". Otherwise the database is inspected as in refresh.
 
-            self.table_infos.append(
-                SQLTableSchema(
-                    table_name=table_info.table_name,
-                    context_str=table_info.table_summary,
-                ),
-            )
+        Yields:
+            List[SQLTableSchema]: A batch of SQLTableSchema instances containing table descriptions.
+        """
+        tables = self._load_table_list()
+        stored = tables is not None and all(table_name in self._disk_index for table_name in tables)
+
+        if stored and os.getenv("SCHEMA_REFRESH", "0") != "1":
+            print(f"Loading stored descriptions for tables: {', '.join(tables)}")
+            self.table_infos = []
+            yield [self._add_schema(self._get_table_info_with_index(table_name)) for table_name in tables]
+            return
+
+        async for table_schemas in self.refresh():
+            yield table_schemas
+
+    async def refresh(self):
+        """
+        Inspects the database and yields batches of descriptions for all its tables as soon as they are available.
+
+        The names of the tables found are saved next to their descriptions. Stored descriptions are yielded first,
+        as one batch. Sample rows for every table without a stored description are fetched in a single round trip,
+        then the LLM calls describing them run concurrently, at most LLM_PARALLELISM (8 by default) at a time. Each
+        batch after the first holds the descriptions completed since the previous one was consumed. Tables that
+        could not be described are skipped and described again on the next run. Every yielded schema is also
+        appended to table_infos.
+
+        Yields:
+            List[SQLTableSchema]: A batch of SQLTableSchema instances containing table descriptions.
+        """
+        # An explicit refresh must see the current schema, not a cached one
+        db.invalidate_schema_cache()
+        self.table_infos = []
+
+        table_infos, missing, samples = await asyncio.to_thread(self._inspect_tables)
+
+        stored = [self._add_schema(table_info) for table_info in table_infos if table_info is not None]
+        if stored:
+            yield stored
+
+        # Bound the number of LLM requests in flight
+        semaphore = asyncio.Semaphore(int(os.getenv("LLM_PARALLELISM", 8)))
+
+        async def process(table_name: str) -> BaseModel | None:
+            async with semaphore:
+                return await self._process_parsing(table_name, samples[table_name])
 
-        return self.table_infos
+        # Tables without samples were skipped by the database layer
+        pending = {asyncio.create_task(process(table_name)) for table_name in missing if table_name in samples}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            parsed = [self._add_schema(task.result()) for task in done if task.result() is not None]
+            if parsed:
+                yield parsed
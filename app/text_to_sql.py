@@ -1,12 +1,31 @@
+import hashlib
+import os
+import re
+from pathlib import Path
 from typing import List
 
-from llama_index.core import SQLDatabase, VectorStoreIndex
+import faiss
+from llama_index.core import SQLDatabase, VectorStoreIndex, StorageContext, load_index_from_storage
 from llama_index.core.objects import ObjectIndex, SQLTableSchema
 from llama_index.core.query_pipeline import FnComponent
 from llama_index.core.llms import ChatResponse
 from llama_index.core.objects import (
     SQLTableNodeMapping,
 )
+from llama_index.vector_stores.faiss import FaissVectorStore
+
+import metadata_cache
+
+# Extraction strategies for the SQL query in a language model response, tried in order
+_SQL_QUERY_RE = re.compile(r"SQLQuery:\s*(?:```(?:sql)?\s*)?(.*?)(?:```|SQLResult:|$)", re.DOTALL)
+_FENCED_SQL_RE = re.compile(r"```(?:sql)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_RAW_SQL_RE = re.compile(r"^\s*((?:SELECT|WITH)\b.*?)(?:SQLResult:|\Z)", re.DOTALL | re.IGNORECASE | re.MULTILINE)
+
+# Number of neighbours per node in the HNSW graph
+HNSW_NEIGHBOURS = 32
+
+# File, inside the persist directory, holding the hash of the table schemas the stored index was built from
+SCHEMA_HASH_FILE = "schema_hash.txt"
 
 
 class VectorStoreRetriever:
@@ -17,18 +36,23 @@ class VectorStoreRetriever:
     from a vector store using the provided table schemas.
     """
 
-    def __init__(self, db, table_schemas, top_k=3):
+    def __init__(self, db, table_schemas=None, top_k=3, persist_dir=None):
         """
         Initializes the VectorStoreRetriever with the given database, table schemas, and top_k value.
 
         Args:
             db (SQLDatabase): The database object used to retrieve table information.
-            table_schemas (List[SQLTableSchema]): A list of table schemas to be used for retrieval.
+            table_schemas (List[SQLTableSchema] | None): A list of table schemas to be used for retrieval. More
+                schemas can be added afterwards with add.
             top_k (int): The number of top similar items to retrieve from the vector store.
+            persist_dir (str | None): The directory where the vector index is stored between runs. The index is
+                rebuilt on every run if it is not set.
         """
         self.db: SQLDatabase = db
-        self.table_schemas: List[SQLTableSchema] = table_schemas
+        self.table_schemas: List[SQLTableSchema] = list(table_schemas or [])
         self.top_k: int = top_k
+        self.persist_dir: str | None = persist_dir
+        self._index: ObjectIndex | None = None
 
     def get_mapping(self):
         """
@@ -46,20 +70,142 @@ class VectorStoreRetriever:
     """
         return SQLTableNodeMapping(self.db)
 
-    def get_retriever(self):
+    def get_schema_hash(self) -> str:
         """
-        Creates a retriever object from the vector store using the table schemas and mapping.
+        Computes a hash of the table names and summaries the index is built from.
 
         Returns:
-            ObjectIndex: The retriever object for the vector store.
+            str: The hexadecimal SHA-256 digest of the table schemas.
         """
-        index = ObjectIndex.from_objects(
+        digest = hashlib.sha256()
+        for table_name, context_str in sorted((t.table_name, t.context_str or "") for t in self.table_schemas):
+            digest.update(f"{table_name}\t{context_str}\n".encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def get_vector_store() -> FaissVectorStore:
+        """
+        Creates an empty FAISS vector store backed by an HNSW graph.
+
+        HNSW gives approximate nearest neighbour lookups in logarithmic time instead of the linear scan done by the
+        default in-memory vector store. The embedding size is read from EMBED_DIM (1536 by default, the size of
+        OpenAI's text-embedding-ada-002 embeddings).
+
+        Returns:
+            FaissVectorStore: The empty vector store.
+        """
+        faiss_index = faiss.IndexHNSWFlat(int(os.getenv("EMBED_DIM", 1536)), HNSW_NEIGHBOURS)
+        return FaissVectorStore(faiss_index=faiss_index)
+
+    def _build_index(self) -> ObjectIndex:
+        """
+        Builds the object index by embedding every table schema.
+
+        Returns:
+            ObjectIndex: The object index over the table schemas.
+        """
+        return ObjectIndex.from_objects(
             self.table_schemas,
             self.get_mapping(),
             index_cls=VectorStoreIndex,
+            storage_context=StorageContext.from_defaults(vector_store=self.get_vector_store()),
         )
 
-        return index.as_retriever(similarity_top_k=self.top_k)
+    def _load_index(self, schema_hash: str) -> ObjectIndex | None:
+        """
+        Loads the persisted object index if it was built from the same table schemas.
+
+        Args:
+            schema_hash (str): The hash of the current table schemas.
+
+        Returns:
+            ObjectIndex | None: The persisted object index, or None if it is missing or outdated.
+        """
+        hash_file = Path(self.persist_dir) / SCHEMA_HASH_FILE
+        if not hash_file.exists() or hash_file.read_text() != schema_hash:
+            return None
+
+        storage_context = StorageContext.from_defaults(
+            vector_store=FaissVectorStore.from_persist_dir(self.persist_dir),
+            persist_dir=self.persist_dir,
+        )
+        return ObjectIndex(load_index_from_storage(storage_context), self.get_mapping())
+
+    def _persist_index(self, index: ObjectIndex, schema_hash: str):
+        """
+        Persists the object index along with the hash of the table schemas it was built from.
+
+        Args:
+            index (ObjectIndex): The object index to persist.
+            schema_hash (str): The hash of the table schemas.
+        """
+        index.index.storage_context.persist(persist_dir=self.persist_dir)
+        (Path(self.persist_dir) / SCHEMA_HASH_FILE).write_text(schema_hash)
+
+    def _has_persisted_index(self) -> bool:
+        """
+        Checks whether a persisted object index is available.
+
+        Returns:
+            bool: True if a persist directory is configured and holds an index, False otherwise.
+        """
+        return bool(self.persist_dir) and (Path(self.persist_dir) / SCHEMA_HASH_FILE).exists()
+
+    def add(self, table_schemas: List[SQLTableSchema]):
+        """
+        Adds a batch of table schemas to the retriever.
+
+        Unless a persisted index may still be reused, the batch is embedded and inserted into the index right away,
+        so the index is built incrementally while the remaining tables are being described. Each batch is embedded
+        with batched requests rather than one request per table.
+
+        Args:
+            table_schemas (List[SQLTableSchema]): The table schemas to add.
+        """
+        self.table_schemas.extend(table_schemas)
+
+        if self._index is not None:
+            # SQLTableNodeMapping rebuilds schemas from node metadata, so the nodes can be inserted directly
+            mapping = self.get_mapping()
+            self._index.index.insert_nodes([mapping.to_node(table_schema) for table_schema in table_schemas])
+        elif not self._has_persisted_index():
+            self._index = self._build_index()
+
+    def get_index(self) -> ObjectIndex:
+        """
+        Returns the object index over the table schemas.
+
+        When a persist directory is configured, the stored index is reused as long as the table schemas are
+        unchanged, so the table summaries are not embedded again on every startup.
+
+        Returns:
+            ObjectIndex: The object index over the table schemas.
+        """
+        if not self.persist_dir:
+            if self._index is None:
+                self._index = self._build_index()
+            return self._index
+
+        schema_hash = self.get_schema_hash()
+
+        if self._index is None:
+            self._index = self._load_index(schema_hash)
+            if self._index is not None:
+                return self._index
+            self._index = self._build_index()
+
+        # The index was built in this run, store it for the next ones
+        self._persist_index(self._index, schema_hash)
+        return self._index
+
+    def get_retriever(self):
+        """
+        Creates a retriever object from the vector store using the table schemas and mapping.
+
+        Returns:
+            ObjectIndex: The retriever object for the vector store.
+        """
+        return self.get_index().as_retriever(similarity_top_k=self.top_k)
 
 
 class TableContextCreator:
@@ -103,20 +249,52 @@ class TableContextCreator:
         This method fetches the table information for a specified table name from the database.
         The information includes the table name and column types (e.g., INTEGER, VARCHAR, TIMESTAMP).
 
+        The information is kept in the metadata cache, so the database is only inspected again once it expires.
+
         Args:
             table_name (str): The name of the table to retrieve information for.
 
         Returns:
             str: The table information.
         """
-        return self.db.get_single_table_info(table_name)
+        return metadata_cache.get_or_set(
+            ("single_table_info", table_name),
+            lambda: self.db.get_single_table_info(table_name),
+        )
+
+    def invalidate(self, table_name: str | None = None):
+        """
+        Removes cached table information, so it is inspected again on next use.
+
+        Args:
+            table_name (str | None): The table to invalidate. All tables are invalidated if it is not given.
+        """
+        if table_name is None:
+            metadata_cache.invalidate_all()
+        else:
+            metadata_cache.invalidate(("single_table_info", table_name))
+            metadata_cache.invalidate_prefix(("table_context", table_name))
+
+    def get_table_context(self, table_schema: SQLTableSchema) -> str:
+        """
+        Retrieves the full context string for a table, building it only when it is not in the metadata cache.
+
+        Args:
+            table_schema (SQLTableSchema): The schema of the table.
+
+        Returns:
+            str: The full context string for the table.
+        """
+        return metadata_cache.get_or_set(
+            ("table_context", table_schema.table_name, table_schema.context_str),
+            lambda: self.create_full_context(self.get_info(table_schema.table_name), table_schema.context_str),
+        )
 
     def get_contexts(self, tables_schemas):
         """
         Generates context strings for a list of tables.
 
-        This method creates table schemas and retrieves table information to generate context strings
-        for each table in the provided list.
+        This method joins the prebuilt context string of each table in the provided list.
 
         Args:
             tables_schemas (List[SQLTableSchema]): A list of table schemas to generate contexts for.
@@ -124,14 +302,7 @@ class TableContextCreator:
         Returns:
             str: The combined context strings for all tables.
         """
-        descriptions = []
-
-        for table in tables_schemas:
-            table_info = self.get_info(table.table_name)
-            table_description = self.create_full_context(table_info, table.context_str)
-            descriptions.append(table_description)
-
-        return "\n\n".join(descriptions)
+        return "\n\n".join(self.get_table_context(table) for table in tables_schemas)
 
     def get_component(self):
         """
@@ -155,8 +326,9 @@ class LlmResponseParser:
         """
         Parses the response from a language model to extract the SQL query.
 
-        This method looks for specific prefixes in the response content to identify and extract the SQL query.
-        It then cleans the extracted query by removing unnecessary characters and formatting.
+        This method tries precompiled patterns in order: the query following the "SQLQuery:" prefix, a fenced code
+        block, and a line starting a SELECT/WITH statement. Each pattern stops before the "SQLResult:" section. If none
+        matches, the text before "SQLResult:" is used as is. The extracted query is then flattened to a single line.
 
         Args:
             response (ChatResponse): The response object from the language model containing the message content.
@@ -164,22 +336,17 @@ class LlmResponseParser:
         Returns:
             str: The cleaned SQL query extracted from the response.
         """
-        sql_query_prefix = "SQLQuery:"
-        sql_result_prefix = "SQLResult:"
-
         response_content = response.message.content
-        sql_query_start_index = response_content.find(sql_query_prefix)
-        sql_result_start_index = response_content.find(sql_result_prefix)
-
-        if sql_query_start_index != -1:
-            response_content = response_content[sql_query_start_index + len(sql_query_prefix):]
-
-        if sql_result_start_index != -1:
-            response_content = response_content[:sql_result_start_index]
 
-        cleaned_sql_query = response_content.strip().strip("```").strip().replace('\n', ' ')
+        for pattern in (_SQL_QUERY_RE, _FENCED_SQL_RE, _RAW_SQL_RE):
+            match = pattern.search(response_content)
+            if match:
+                sql_query = match.group(1)
+                break
+        else:
+            sql_query = response_content.split("SQLResult:", 1)[0]
 
-        return cleaned_sql_query
+        return sql_query.strip().replace('\n', ' ')
 
     def parse_sql_component(self):
         """
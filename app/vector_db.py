@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 from llama_index.core import SQLDatabase
@@ -11,6 +12,19 @@ from table import TableDescriber
 from text_to_sql import VectorStoreRetriever
 
 
+async def index_descriptions(describer: TableDescriber, vector_store: VectorStoreRetriever):
+    """
+    Adds batches of table descriptions to the vector store as soon as the describer produces them.
+
+    Args:
+        describer (TableDescriber): The describer producing the table descriptions.
+        vector_store (VectorStoreRetriever): The vector store the descriptions are added to.
+    """
+    async for table_schemas in describer.get_descriptions():
+        # Embedding is blocking, keep the event loop free for the pending LLM calls
+        await asyncio.to_thread(vector_store.add, table_schemas)
+
+
 def initialize_vector_db(llm, engine: Engine, db: SQLDatabase) -> ObjectIndex:
     table_info_dir = os.getenv("LOCAL_PERSISTENCE_PATH")
 
@@ -20,12 +34,12 @@ def initialize_vector_db(llm, engine: Engine, db: SQLDatabase) -> ObjectIndex:
         prompt_template_str=prompts.table_summary,
     )
 
-    # Get table names and returns a list of SQLTableSchema with table names and general description
+    # Get table names and index a SQLTableSchema with table name and general description for each of them
     describer = TableDescriber(engine, program, table_info_dir)
-    tables_schemas = describer.get_descriptions()
+    vector_store = VectorStoreRetriever(db, persist_dir=os.getenv("VECTOR_PERSIST_DIR"))
+    asyncio.run(index_descriptions(describer, vector_store))
 
     # Retrieve relevant information from Vector Store
-    object_index = VectorStoreRetriever(db, tables_schemas)
-    obj_retriever = object_index.get_retriever()
+    obj_retriever = vector_store.get_retriever()
 
     return obj_retriever